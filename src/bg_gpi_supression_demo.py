@@ -18,10 +18,32 @@ A transient FUS pulse can further suppress GPi output during a time window to il
 a flip in the selected channel or global disinhibition when too strong.
 """
 
+import os
+import warnings
 import numpy as np
 import nengo
 import matplotlib.pyplot as plt
 
+# ----------------------------
+# Simulator backend: reference nengo.Simulator unless USE_NENGO_OCL=1 is set.
+# nengo_ocl is opt-in: the per-step Python Nodes here cross host<->device every step,
+# and without PYOPENCL_CTX pyopencl prompts for a device on stdin.
+# ----------------------------
+def make_simulator(net, **kwargs):
+    if os.environ.get("USE_NENGO_OCL") == "1":
+        if "PYOPENCL_CTX" not in os.environ:
+            warnings.warn("USE_NENGO_OCL=1 but PYOPENCL_CTX is unset; using nengo.Simulator")
+        else:
+            try:
+                import nengo_ocl
+                return nengo_ocl.Simulator(net, **kwargs)
+            except Exception as e:
+                warnings.warn(f"nengo_ocl unavailable ({e}); using nengo.Simulator")
+    return nengo.Simulator(net, **kwargs)
+
+# Single-precision signals: halves memory traffic in the neuron step loop
+nengo.rc["precision"]["bits"] = "32"
+
 # ----------------------------
 # Tunable parameters (quick edits)
 # ----------------------------
@@ -29,6 +51,7 @@ A1 = 0.85          # cortical drive for action 1
 A2 = 0.65          # cortical drive for action 2
 
 T_total = 1.6      # total simulation time (s)
+dt = 0.001         # simulator timestep (s)
 
 # Global GPi scaling (1.0 = normal inhibition; 0.0 = GPi silenced)
 gpi_scale_base = 1.0
@@ -43,20 +66,30 @@ rng_seed = 0       # reproducibility
 # ----------------------------
 # Helper: time-varying GPi scale under FUS
 # ----------------------------
+# Precomputed once on the sim.trange() grid (one value per timestep):
+# base * (1 - depth) inside the pulse, base outside. Kept as a list of Python floats:
+# indexing it is cheaper than an ndarray and avoids np.float64 arithmetic downstream.
+fus_end = fus_start + fus_dur
+n_steps = int(round(T_total / dt))
+ts = dt * np.arange(1, n_steps + 1)
+gpi_schedule = np.where((ts >= fus_start) & (ts <= fus_end),
+                        gpi_scale_base * (1.0 - fus_depth), gpi_scale_base).tolist()
+
 def gpi_scale_fn(t):
-    in_pulse = (fus_start <= t <= fus_start + fus_dur)
-    return gpi_scale_base * (1.0 - fus_depth if in_pulse else 1.0)
+    # t = (i + 1) * dt -> gpi_schedule[i]; clamped outside [dt, T_total], so runs longer
+    # than T_total (e.g. nengo-gui) hold the post-pulse value instead of replaying the pulse
+    return gpi_schedule[min(max(int(t / dt + 0.5) - 1, 0), n_steps - 1)]
 
 # ----------------------------
 # Build model
 # ----------------------------
-np.random.seed(rng_seed)
-model = nengo.Network(label="BG–Thalamus with GPi suppression")
+model = nengo.Network(label="BG–Thalamus with GPi suppression", seed=rng_seed)
 with model:
     # Cortex drives two action channels
     cortex = nengo.Node(lambda t: [A1, A2], label="Cortex [A1,A2]")
 
     # Basal ganglia (rate model), output ~ GPi inhibitory 'level' per channel
+    # (stock nengo.LIF; nengo_extras' NumbaLIF measured no faster on this model size)
     bg = nengo.networks.BasalGanglia(dimensions=2, label="BasalGanglia")
 
     # Thalamus (rate model), expects inhibitory input from BG and relays winner
@@ -68,28 +101,19 @@ with model:
     # Connect cortex -> BG; BG -> Thalamus (but insert a scaling stage for GPi)
     nengo.Connection(cortex, bg.input, synapse=0.02)
 
-    # We’ll route BG output through a small linear ensemble to apply time-varying scaling
-    # Equivalent to: th.input = gpi_scale(t) * bg.output
+    # Elementwise time-varying scaling: th.input = gpi_scale(t) * bg.output
     # (Lower BG output means less inhibition -> thalamus more active)
-    scaler = nengo.networks.EnsembleArray(n_neurons=100, n_ensembles=2, label="GPi scaler")
-    # Feed BG output into scaler
-    nengo.Connection(bg.output, scaler.input, synapse=0.02)
-    # Multiply by gpi_scale(t): implement as a modulation via connection function
-    # In Nengo, easiest is to create a Node that emits [scale,scale] and connect with a product network,
-    # but here we use a linear trick: drive scaler bias with scale and use a simple 2D elementwise 'product' via
-    # a small network. To stay lightweight, we approximate product with a 2-neuron ensemble per dim.
-    # Simpler: do elementwise scale via a Node that outputs the scaled vector directly (clean & fast).
+    # Done directly in a Node (clean & fast); no neurons needed for a known scalar gain.
     scaled_gpi = nengo.Node(size_in=2, label="Scaled GPi")
-    nengo.Connection(scaler.output, scaled_gpi, synapse=0.01)
-    nengo.Connection(gpi_scale, scaled_gpi[0], synapse=0.0, transform=0.0)  # placeholder to keep node live
-    nengo.Connection(gpi_scale, scaled_gpi[1], synapse=0.0, transform=0.0)  # (no effect; see function below)
+    nengo.Connection(bg.output, scaled_gpi, synapse=0.02)
 
     # Monkey-patch a function onto scaled_gpi to compute elementwise scaling
     def scaled_gpi_func(t, x):
-        # x is [bg0, bg1] coming from scaler.output via first connection
-        # We read the current gpi_scale via gpi_scale_fn(t)
-        s = gpi_scale_fn(t)
-        return [s * x[0], s * x[1]]
+        # x is [bg0, bg1] coming directly from bg.output
+        # Same index expression as gpi_scale_fn (inlined to save a call per step), so the
+        # probed gpi_scale(t) is the gain applied here
+        s = gpi_schedule[min(max(int(t / dt + 0.5) - 1, 0), n_steps - 1)]
+        return (s * x[0], s * x[1])
     scaled_gpi.output = scaled_gpi_func
 
     # Now feed scaled GPi output to thalamus
@@ -105,7 +129,7 @@ with model:
 # ----------------------------
 # Simulate (headless mode)
 # ----------------------------
-with nengo.Simulator(model, seed=rng_seed) as sim:
+with make_simulator(model, dt=dt, seed=rng_seed) as sim:
     sim.run(T_total)
 
 t = sim.trange()
@@ -115,7 +139,7 @@ gpi_scaled = sim.data[p_gpis]
 th_out = sim.data[p_th]
 scale = sim.data[p_scl].reshape(-1)
 
-winner = th_out.argmax(axis=1)
+winner_end = int(th_out[-1].argmax())   # only the final timestep is reported
 
 # ----------------------------
 # Plot
@@ -146,7 +170,7 @@ ax[3].plot(t, th_out[:, 0], label="Th ch1")
 ax[3].plot(t, th_out[:, 1], label="Th ch2")
 ax[3].set_ylabel("Thalamus")
 ax[3].set_xlabel("Time (s)")
-ax[3].text(0.02, 0.75, f"Winner @ end: {int(winner[-1])}", transform=ax[3].transAxes)
+ax[3].text(0.02, 0.75, f"Winner @ end: {winner_end}", transform=ax[3].transAxes)
 
 plt.tight_layout()
 plt.show()